@@ -1,13 +1,29 @@
-import json
 import os
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator
 
 import boto3
+import orjson
+from botocore.config import Config
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+@lru_cache(maxsize=None)
+def _get_s3_client(aws_access_key_id: str, aws_secret_access_key: str):
+    session = boto3.Session(
+        aws_access_key_id=aws_access_key_id,
+        aws_secret_access_key=aws_secret_access_key,
+    )
+    return session.client(
+        "s3",
+        endpoint_url="http://localhost:9000",
+        config=Config(max_pool_connections=64, retries={"max_attempts": 5, "mode": "adaptive"}),
+    )
+
+
 @dataclass
 class AWSS3:
     aws_access_key_id: str = os.environ["MINIO_ROOT_USER"]
@@ -18,29 +34,32 @@ class AWSS3:
         self.__connect_aws_s3()
 
     def __connect_aws_s3(self):
-        session = boto3.Session(
-            aws_access_key_id=self.aws_access_key_id,
-            aws_secret_access_key=self.aws_secret_access_key,
-        )
-        self.client = session.client("s3", endpoint_url="http://localhost:9000")
+        self.client = _get_s3_client(self.aws_access_key_id, self.aws_secret_access_key)
 
     def save_dict_to_json(self, item: dict, path: str):
         self.client.put_object(
             Bucket=self.bucket_name,
-            Body=json.dumps(item),
+            Body=orjson.dumps(item, option=orjson.OPT_NON_STR_KEYS),
             Key=path,
         )
 
-    def list_files_from_path(self, path: str = ""):
-        objects = self.client.list_objects_v2(
+    def iter_objects_from_path(self, path: str = "") -> Iterator[dict]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        pages = paginator.paginate(
             Bucket=self.bucket_name,
             Prefix=path,
-        ).get("Contents")
+            PaginationConfig={"PageSize": 1000},
+        )
+        for page in pages:
+            yield from page.get("Contents", ())
+
+    def iter_files_from_path(self, path: str = "") -> Iterator[str]:
+        for obj in self.iter_objects_from_path(path):
+            yield obj["Key"]
 
-        return [obj.get("Key") for obj in objects] if objects else None
+    def list_files_from_path(self, path: str = "") -> list:
+        return list(self.iter_files_from_path(path))
 
     def read_json(self, path: str) -> dict:
         file_obj = self.client.get_object(Bucket=self.bucket_name, Key=path)
-        file_content = file_obj["Body"].read()
-        string_content = file_content.decode("utf-8")
-        return json.loads(string_content)
+        return orjson.loads(file_obj["Body"].read())
@@ -1,13 +1,26 @@
 import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
 from dataclasses import dataclass
+from typing import Optional
 
 import gradio as gr
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from langchain import PromptTemplate
 from langchain.chains import ConversationalRetrievalChain
 from langchain.chat_models import ChatOpenAI
+from langchain.docstore.document import Document
 from langchain.document_loaders import DataFrameLoader
+from langchain.embeddings.base import Embeddings
 from langchain.embeddings.openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.vectorstores import Chroma
@@ -16,6 +29,163 @@ from pymongo import MongoClient
 
 load_dotenv()
 
+_COLLECTION_METADATA = {"hnsw:space": "cosine", "hnsw:construction_ef": 200, "hnsw:search_ef": 100, "hnsw:M": 32}
+
+
+@dataclass
+class CachedEmbeddings(Embeddings):
+    """
+    An Embeddings wrapper that caches document embeddings on disk, so that texts already embedded in a
+    previous run (or earlier in the same run) are not sent to the underlying model again. Each embedding
+    is stored in its own file, keyed by the SHA-256 of the namespace and the text, so changing the
+    namespace (e.g. the model name) invalidates the cache. The most recent query embeddings are kept in
+    memory, so that a question embedded for the question cache is reused by the retriever.
+
+    Args:
+        embeddings (Embeddings): The underlying embedding model.
+        cache_dir (str): The directory where the embeddings are stored.
+        namespace (str): The namespace of the cached embeddings, usually the embedding model name.
+        query_cache_size (int): The number of query embeddings kept in memory. Default is 32.
+    """
+
+    embeddings: Embeddings
+    cache_dir: str
+    namespace: str
+    query_cache_size: int = 32
+
+    def __post_init__(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._queries = OrderedDict()
+        self._queries_lock = threading.Lock()
+
+    def _path(self, text: str) -> str:
+        """
+        Returns the path of the cache entry for a text, named after the SHA-256 of the namespace and the text.
+
+        Args:
+            text (str): The text whose cache entry is to be located.
+
+        Returns
+        -------
+            str: The path of the cache entry.
+        """
+        key = hashlib.sha256(f"{self.namespace}|{text}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
+    def _read(self, texts: list) -> dict:
+        """
+        Reads the cached embeddings of the given texts. Missing or unreadable entries are treated as cache misses.
+
+        Args:
+            texts (list): The texts whose embeddings are to be read.
+
+        Returns
+        -------
+            dict: A dictionary mapping each cached text to its embedding.
+        """
+        cached = {}
+        for text in texts:
+            if text in cached:
+                continue
+            try:
+                with open(self._path(text)) as f:
+                    cached[text] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        return cached
+
+    def _write(self, texts: list, vectors: list) -> dict:
+        """
+        Stores the embeddings of the given texts. Each entry is written to a temporary file in `cache_dir`
+        and atomically renamed into place, so a reader never sees a partially written entry.
+
+        Args:
+            texts (list): The embedded texts.
+            vectors (list): The embeddings, in the same order as the texts.
+
+        Returns
+        -------
+            dict: A dictionary mapping each text to its embedding.
+        """
+        for text, vector in zip(texts, vectors):
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(vector, f)
+            os.replace(tmp_path, self._path(text))
+        return dict(zip(texts, vectors))
+
+    def embed_documents(self, texts: list) -> list:
+        """
+        Embeds the texts, sending only the distinct texts missing from the cache to the underlying model.
+
+        Args:
+            texts (list): The texts to be embedded.
+
+        Returns
+        -------
+            list: The embeddings, in the same order as the input texts.
+        """
+        cached = self._read(texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        if missing:
+            cached.update(self._write(missing, self.embeddings.embed_documents(missing)))
+        return [cached[text] for text in texts]
+
+    async def aembed_documents(self, texts: list) -> list:
+        """
+        Asynchronously embeds the texts, sending only the distinct texts missing from the cache to the
+        underlying model.
+
+        Args:
+            texts (list): The texts to be embedded.
+
+        Returns
+        -------
+            list: The embeddings, in the same order as the input texts.
+        """
+        cached = self._read(texts)
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        if missing:
+            cached.update(self._write(missing, await self.embeddings.aembed_documents(missing)))
+        return [cached[text] for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        """
+        Embeds a query, reusing the embedding if the same query was embedded recently. Up to
+        `query_cache_size` query embeddings are kept in memory, least recently used first out.
+
+        Args:
+            text (str): The query to be embedded.
+
+        Returns
+        -------
+            list: The embedding of the query.
+        """
+        with self._queries_lock:
+            if text in self._queries:
+                self._queries.move_to_end(text)
+                return self._queries[text]
+
+        vector = self.embeddings.embed_query(text)
+        with self._queries_lock:
+            self._queries[text] = vector
+            if len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+        return vector
+
+    async def aembed_query(self, text: str) -> list:
+        """
+        Asynchronously embeds a query using the underlying model.
+
+        Args:
+            text (str): The query to be embedded.
+
+        Returns
+        -------
+            list: The embedding of the query.
+        """
+        return await self.embeddings.aembed_query(text)
+
 
 @dataclass
 class Chatbot:
@@ -31,6 +201,14 @@ class Chatbot:
         embedding_model (str): The model to use for generating text embeddings. Default is 'text-embedding-ada-002'.
         chunk_size (int): The size of each chunk when splitting documents. Default is 1000.
         chunk_overlap (int): The size of the overlap between consecutive chunks. Default is 50.
+        embedding_batch_size (int): The number of chunks sent in each embedding request. Default is 1000.
+        embedding_concurrency (int): The maximum number of embedding requests in flight. Default is 16.
+        persist_directory (str): The directory where the Chroma index is persisted. Default is './chroma_{company}'.
+        cache_threshold (float): The cosine similarity above which a cached answer is reused. Default is 0.95.
+        cache_size (int): The maximum number of answers kept in the question cache. Default is 512.
+        embedding_cache_dir (str): The directory where document embeddings are cached. Default is './emb_cache'.
+        concurrency_count (int): The number of questions answered concurrently by the app. Default is 4.
+        queue_max_size (int): The maximum number of questions waiting in the app queue. Default is 64.
     """
 
     company: str
@@ -40,8 +218,19 @@ class Chatbot:
     embedding_model: str = "text-embedding-ada-002"
     chunk_size: int = 1000
     chunk_overlap: int = 50
+    embedding_batch_size: int = 1000
+    embedding_concurrency: int = 16
+    persist_directory: Optional[str] = None
+    cache_threshold: float = 0.95
+    cache_size: int = 512
+    embedding_cache_dir: str = "./emb_cache"
+    concurrency_count: int = 4
+    queue_max_size: int = 64
 
     def __post_init__(self):
+        self.persist_directory = self.persist_directory or f"./chroma_{self.company}"
+        self._qcache = []
+        self._qcache_lock = threading.Lock()
         self.__connect_mongodb()
 
     def __connect_mongodb(self) -> None:
@@ -66,32 +255,68 @@ class Chatbot:
             pd.DataFrame: A DataFrame containing the company data. Each row represents
             a document, with the columns 'url' and 'text' storing the document's URL and content.
         """
-        data = list(self.collection.find())
-        df = (
-            pd.DataFrame(data)
-            .loc[:, ["url", "title", "description", "texts"]]
-            .dropna()
-            .assign(text=lambda x: "Title: " + x.title + "\nDescription: " + x.description + "\nContent: " + x.texts)
-            .loc[:, ["url", "text"]]
+        fields = ["url", "title", "description", "texts"]
+        cursor = self.collection.find(
+            filter={field: {"$ne": None} for field in fields},
+            projection={**{field: 1 for field in fields}, "_id": 0},
+            batch_size=1000,
+        )
+        records = (
+            (doc["url"], f"Title: {doc['title']}\nDescription: {doc['description']}\nContent: {doc['texts']}")
+            for doc in cursor
         )
+        df = pd.DataFrame.from_records(records, columns=["url", "text"])
         logger.info(f"Number of documents identified for {self.company}: {len(df)}")
         return df
 
-    def run(self) -> None:
+    def get_fingerprint(self, data: pd.DataFrame) -> str:
         """
-        Main function to run the chatbot. This involves the following steps:
-        1. Loading the company data.
-        2. Splitting the documents into chunks.
-        3. Generating embeddings for each chunk.
-        4. Initialising the retrieval chain.
-        5. Setting up the Gradio interface and launching the chatbot.
+        Computes a fingerprint of the company data and of the settings that affect the embeddings,
+        used to decide whether the persisted Chroma index is still up to date.
+
+        Args:
+            data (pd.DataFrame): The company data, as returned by `get_company_data`.
+
+        Returns
+        -------
+            str: The SHA-256 hex digest of the data and settings.
+        """
+        fingerprint = hashlib.sha256(pd.util.hash_pandas_object(data).values.tobytes())
+        fingerprint.update(f"{self.embedding_model}|{self.chunk_size}|{self.chunk_overlap}".encode())
+        fingerprint.update(repr(sorted(_COLLECTION_METADATA.items())).encode())
+        return fingerprint.hexdigest()
+
+    def is_vectorstore_current(self, fingerprint: str) -> bool:
+        """
+        Checks whether the persisted Chroma index was built from data matching the given fingerprint.
+
+        Args:
+            fingerprint (str): The fingerprint of the current company data.
+
+        Returns
+        -------
+            bool: True if the persisted index can be reused, False otherwise.
+        """
+        fingerprint_path = os.path.join(self.persist_directory, ".fingerprint")
+        if not os.path.isfile(fingerprint_path):
+            return False
+        with open(fingerprint_path) as f:
+            return f.read() == fingerprint
+
+    def split_documents(self, data: pd.DataFrame) -> list[Document]:
+        """
+        Loads the company data into documents and splits them into chunks.
+
+        Args:
+            data (pd.DataFrame): The company data, as returned by `get_company_data`.
+
+        Returns
+        -------
+            list[Document]: The chunked documents.
         """
-        # Load Company Data
-        data = self.get_company_data()
         loader = DataFrameLoader(data_frame=data)
         document = loader.load()
 
-        # Split documents
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
@@ -99,11 +324,154 @@ class Chatbot:
         )
         documents = text_splitter.split_documents(document)
         logger.info(f"Number of documents after splitting: {len(documents)}")
+        return documents
+
+    async def aembed_documents(self, embedding: Embeddings, texts: list) -> list:
+        """
+        Embeds the texts concurrently, splitting them into batches and keeping at most `embedding_concurrency`
+        requests in flight. Batches are sized so that the texts are spread across all concurrent requests,
+        capped at `embedding_batch_size` texts each.
+
+        Args:
+            embedding (Embeddings): The embedding model used to embed the texts.
+            texts (list): The texts to be embedded.
+
+        Returns
+        -------
+            list: The embeddings, in the same order as the input texts.
+        """
+        semaphore = asyncio.Semaphore(self.embedding_concurrency)
+        batch_size = max(1, min(self.embedding_batch_size, math.ceil(len(texts) / self.embedding_concurrency)))
+        batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+        async def embed(batch: list) -> list:
+            async with semaphore:
+                return await embedding.aembed_documents(batch)
+
+        results = await asyncio.gather(*(embed(batch) for batch in batches))
+        return [vector for result in results for vector in result]
+
+    def open_vectorstore(self, embedding: Embeddings) -> Chroma:
+        """
+        Opens the Chroma vector store persisted at `persist_directory`, creating its collection if needed.
+
+        Args:
+            embedding (Embeddings): The embedding model used to embed the queries.
+
+        Returns
+        -------
+            Chroma: The persisted vector store.
+        """
+        return Chroma(
+            embedding_function=embedding,
+            persist_directory=self.persist_directory,
+            collection_metadata=_COLLECTION_METADATA,
+        )
+
+    def build_vectorstore(self, documents: list[Document], embedding: Embeddings, fingerprint: str) -> Chroma:
+        """
+        Embeds the documents and loads them into a Chroma vector store persisted at `persist_directory`,
+        replacing any previous index. The collection uses a cosine HNSW index tuned for recall. Documents
+        are sorted by length so that each batch holds chunks of similar size.
+
+        Args:
+            documents (list[Document]): The chunked documents to be embedded.
+            embedding (Embeddings): The embedding model used to embed the documents.
+            fingerprint (str): The fingerprint of the company data, stored alongside the index.
+
+        Returns
+        -------
+            Chroma: The vector store containing the embedded documents.
+        """
+        documents = sorted(documents, key=lambda doc: len(doc.page_content))
+        texts = [doc.page_content for doc in documents]
+        embeddings = asyncio.run(self.aembed_documents(embedding, texts))
+
+        # Reset only the Chroma collection, leaving anything else in `persist_directory` untouched
+        fingerprint_path = os.path.join(self.persist_directory, ".fingerprint")
+        if os.path.isfile(fingerprint_path):
+            os.remove(fingerprint_path)
+        self.open_vectorstore(embedding).delete_collection()
+        docsearch = self.open_vectorstore(embedding)
+        docsearch._collection.add(
+            ids=[str(uuid.uuid1()) for _ in texts],
+            embeddings=embeddings,
+            metadatas=[doc.metadata for doc in documents],
+            documents=texts,
+        )
+        docsearch.persist()
+
+        with open(fingerprint_path, "w") as f:
+            f.write(fingerprint)
+        return docsearch
+
+    def get_cached_answer(self, query_embedding: np.ndarray) -> Optional[str]:
+        """
+        Looks up the question cache for an answer to a question similar to the given one. On a hit,
+        the entry is moved to the end of the cache so that the least recently used entries are evicted first.
+
+        Args:
+            query_embedding (np.ndarray): The normalized embedding of the question.
+
+        Returns
+        -------
+            Optional[str]: The cached answer, or None if no cached question is similar enough.
+        """
+        with self._qcache_lock:
+            if not self._qcache:
+                return None
+            sims = np.stack([vector for vector, _ in self._qcache]) @ query_embedding
+            best = int(sims.argmax())
+            if sims[best] < self.cache_threshold:
+                return None
+            entry = self._qcache.pop(best)
+            self._qcache.append(entry)
+            return entry[1]
+
+    def cache_answer(self, query_embedding: np.ndarray, answer: str) -> None:
+        """
+        Stores an answer in the question cache, evicting the least recently used entry if the cache is full.
+
+        Args:
+            query_embedding (np.ndarray): The normalized embedding of the question.
+            answer (str): The answer to the question.
+        """
+        with self._qcache_lock:
+            if len(self._qcache) >= self.cache_size:
+                self._qcache.pop(0)
+            self._qcache.append((query_embedding, answer))
+
+    def run(self) -> None:
+        """
+        Main function to run the chatbot. This involves the following steps:
+        1. Loading the company data.
+        2. Reusing the persisted embeddings if the data is unchanged, otherwise splitting the documents
+           into chunks and generating embeddings for each chunk.
+        3. Initialising the retrieval chain.
+        4. Setting up the Gradio interface and launching the chatbot.
+        """
+        # Load Company Data
+        data = self.get_company_data()
+        fingerprint = self.get_fingerprint(data)
+        embedding = CachedEmbeddings(
+            embeddings=OpenAIEmbeddings(
+                model=self.embedding_model,
+                chunk_size=self.embedding_batch_size,
+                max_retries=6,
+            ),
+            cache_dir=self.embedding_cache_dir,
+            namespace=self.embedding_model,
+        )
 
-        # Generate embeddings into persistent ChromaDB
-        logger.info(f"Generating embeddings using: {self.embedding_model}...")
-        embedding = OpenAIEmbeddings(model=self.embedding_model)
-        docsearch = Chroma.from_documents(documents=documents, embedding=embedding)
+        if self.is_vectorstore_current(fingerprint):
+            # Load embeddings from persistent ChromaDB
+            logger.info(f"Loading persisted embeddings from: {self.persist_directory}")
+            docsearch = self.open_vectorstore(embedding)
+        else:
+            # Split documents and generate embeddings into persistent ChromaDB
+            documents = self.split_documents(data)
+            logger.info(f"Generating embeddings using: {self.embedding_model}...")
+            docsearch = self.build_vectorstore(documents=documents, embedding=embedding, fingerprint=fingerprint)
 
         # Generate custom prompt
         custom_prompt = PromptTemplate.from_template(
@@ -135,24 +503,31 @@ class Chatbot:
             chatbot = gr.Chatbot(label=f"{self.company} Chatbot", height=900)
             msg = gr.Textbox()
             clear = gr.Button("Clear")
-            chat_history = []
 
             def user(user_message, history):
-                # Convert chat history to list of tuples
-                chat_history_tuples = []
-                for message in chat_history:
-                    chat_history_tuples.append((message[0], message[1]))
+                # Gradio serializes the history turns as lists, the QA chain expects tuples
+                chat_history = [tuple(turn) for turn in history or []]
 
-                # Get response from QA chain
-                response = qa({"question": user_message, "chat_history": chat_history_tuples})
+                # Reuse the answer of a similar opening question if cached, otherwise get response from QA chain.
+                # Follow-up questions depend on the conversation, so they always go through the QA chain.
+                answer = None
+                if not chat_history:
+                    query_embedding = np.asarray(embedding.embed_query(user_message))
+                    query_embedding /= np.linalg.norm(query_embedding)
+                    answer = self.get_cached_answer(query_embedding)
+                if answer is None:
+                    response = qa({"question": user_message, "chat_history": chat_history})
+                    answer = response["answer"]
+                    if not chat_history:
+                        self.cache_answer(query_embedding, answer)
                 # Append user message and response to chat history
-                history.append((user_message, response["answer"]))
-                return gr.update(value=""), history
+                chat_history.append((user_message, answer))
+                return gr.update(value=""), chat_history
 
-            msg.submit(fn=user, inputs=[msg, chatbot], outputs=[msg, chatbot], queue=False)
+            msg.submit(fn=user, inputs=[msg, chatbot], outputs=[msg, chatbot], queue=True)
             clear.click(fn=lambda: None, inputs=None, outputs=chatbot, queue=False)
 
-        app.launch(debug=True)
+        app.queue(concurrency_count=self.concurrency_count, max_size=self.queue_max_size).launch(debug=True)
 
 
 if __name__ == "__main__":
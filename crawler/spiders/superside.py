@@ -2,12 +2,17 @@
 This module contains a specific implementation of Scrapy's CrawlSpider for the superside.com domain.
 
 It is designed to crawl the pages on the website, parse the HTML response, and store the parsed data (specifically,
-the URL and the HTML content) in JSON files.
+the URL and the raw HTML content, base64-encoded) in JSON files.
 
 Each JSON file is named after the URL of the crawled webpage (cleaned to be ASCII compliant) and is saved in AWS S3
 bucket.
 """
 
+import base64
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from threading import BoundedSemaphore
+
 from dotenv import load_dotenv
 from scrapy.http import HtmlResponse
 from scrapy.spiders import CrawlSpider, Rule
@@ -29,6 +34,9 @@ class SupersideSpider(CrawlSpider):
     start_urls: A list of URLs where the spider will begin to crawl from.
     rules: A tuple containing one or more Rule objects. Each Rule defines a certain behavior for crawling the website.
     s3: An AWSS3 object to handle the saving of JSON files to AWS S3 bucket.
+    executor: A ThreadPoolExecutor that uploads the JSON files in the background, so crawling doesn't block on S3.
+    max_pending_uploads: The maximum number of uploads queued or in flight. Once reached, the spider waits for an
+        upload to finish before queuing the next one, so a slow S3 applies backpressure instead of growing memory.
     """
 
     name = "Superside"
@@ -38,11 +46,19 @@ class SupersideSpider(CrawlSpider):
     rules = (Rule(callback="parse_item", follow=True),)
 
     s3 = AWSS3()
+    max_pending_uploads = 32
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.executor = ThreadPoolExecutor(max_workers=8)
+        self.pending_uploads = BoundedSemaphore(self.max_pending_uploads)
 
     def parse_item(self, response: HtmlResponse) -> None:
         """
-        Parses the HTML response of a webpage, stores the URL and HTML content into a JSON file and saves it to an AWS 
-        S3 bucket.
+        Parses the HTML response of a webpage, stores the URL, the raw HTML bytes (base64-encoded) and their encoding
+        (as resolved by Scrapy from the HTTP headers and the body) into a JSON file and uploads it to an AWS S3 bucket
+        in the background. Keeping the raw bytes lets the processing step feed them to lxml without a decode/encode
+        roundtrip.
 
         The JSON file is named after the ASCII compliant version of the URL (all non-ASCII characters are replaced 
         with '-').
@@ -59,7 +75,32 @@ class SupersideSpider(CrawlSpider):
 
         item = {
             "url": response.url,
-            "content": response.text,
+            "content_b64": base64.b64encode(response.body).decode(),
+            "encoding": response.encoding,
         }
 
-        self.s3.save_dict_to_json(item=item, path=file_path)
+        self.pending_uploads.acquire()
+        future = self.executor.submit(self.s3.save_dict_to_json, item=item, path=file_path)
+        future.add_done_callback(partial(self._upload_done, file_path))
+
+    def _upload_done(self, file_path: str, future: Future) -> None:
+        """
+        Frees the pending upload slot and logs the error raised while uploading a JSON file to the AWS S3 bucket,
+        if any.
+
+        Parameters:
+            file_path: The S3 key of the uploaded JSON file.
+            future: The Future of the upload.
+        """
+        self.pending_uploads.release()
+        if future.exception():
+            self.logger.error(f"Failed to upload {file_path}: {future.exception()!r}")
+
+    def closed(self, reason: str) -> None:
+        """
+        Waits for the pending uploads to finish when the spider is closed.
+
+        Parameters:
+            reason: A string describing why the spider was closed.
+        """
+        self.executor.shutdown(wait=True)
@@ -10,15 +10,17 @@ import re
 import sys
 from dataclasses import dataclass
 from glob import glob
-from typing import Optional
+from typing import Optional, Union
 
 from loguru import logger
+from lxml import etree
 from lxml.html import HtmlElement
-from nested_lookup import nested_lookup
 from pymongo import MongoClient
 
 from aws.s3 import AWSS3
 
+_HTML_TAG_RE = re.compile(r"<[^>]*>")
+
 
 @dataclass
 class BaseProcessing:
@@ -32,6 +34,8 @@ class BaseProcessing:
         debug (bool): If True, sets the logger level to 'DEBUG'. If False, 'INFO'.
         database (str): Name of the MongoDB database. Defaults to "data".
         invalid_pages (tuple): Tuple of substrings that determine invalid file paths.
+        max_workers (int): Number of threads used to process files concurrently. Defaults to 32.
+        bulk_size (int): Maximum number of operations per MongoDB bulk write. Defaults to 1000.
     """
 
     company: str
@@ -44,15 +48,20 @@ class BaseProcessing:
         "-blog-category-",
         "-blog-tag-",
     )
+    max_workers: int = 32
+    bulk_size: int = 1000
 
     def __post_init__(self) -> None:
         """
-        Initializes the MongoDB connection and sets the logger level.
+        Initializes the MongoDB connection, sets the logger level and compiles the invalid pages pattern.
         This method is called automatically after the class is instantiated.
         """
         self._set_logger_level()
         self._connect_mongodb()
         self.s3 = AWSS3()
+        self._invalid_pages_re = (
+            re.compile("|".join(map(re.escape, self.invalid_pages))) if self.invalid_pages else None
+        )
 
     def _connect_mongodb(self) -> None:
         """
@@ -85,14 +94,17 @@ class BaseProcessing:
         contain any substring specified in the `invalid_pages` attribute.
         """
         files = glob(f"datalake/{self.company}/*.json")
-        files_valid = [file for file in files if not any(substring in file for substring in self.invalid_pages)]
+        if self._invalid_pages_re is None:
+            files_valid = files
+        else:
+            files_valid = [file for file in files if not self._invalid_pages_re.search(file)]
         self.log.info(f"Number of html files found: {len(files_valid)}")
         return files_valid
 
     def extract_next_data(self, tree: HtmlElement) -> Optional[list]:
         """
         Extracts data from the "__NEXT_DATA__" script tag in the provided HTML tree.
-        It looks for 'paragraph', 'body', 'content', and 'title' keys in the parsed JSON data.
+        It looks for 'paragraph', 'body' and 'content' keys in the parsed JSON data.
         The values associated with these keys are cleaned of any HTML tags and concatenated into a single string.
 
         Args:
@@ -104,26 +116,49 @@ class BaseProcessing:
         """
         data = tree.xpath("//script[@id='__NEXT_DATA__']//text()")[0]
         data_parsed = json.loads(data)
-        paragraph = nested_lookup("paragraph", data_parsed)
-        body = nested_lookup("body", data_parsed)
-        content = nested_lookup("content", data_parsed)
-        nested_lookup("title", data_parsed)
+        found = self.lookup_keys(data_parsed, ("paragraph", "body", "content"))
 
         next_data = []
-        next_data.extend(paragraph)
-        next_data.extend(body)
-        next_data.extend(content)
+        next_data.extend(found["paragraph"])
+        next_data.extend(found["body"])
+        next_data.extend(found["content"])
 
         next_data_cleaned = [self.cleanhtml(text.strip()) for text in next_data if text]
         next_data_text = " ".join(next_data_cleaned).replace("\n", "").replace("&nbsp;", "")
 
         return next_data_text or None
 
+    @staticmethod
+    def lookup_keys(data: Union[dict, list], keys: tuple) -> dict:
+        """
+        Collects the values of the given keys at any depth of a parsed JSON object, in a single
+        iterative depth-first traversal.
+
+        Args:
+            data (Union[dict, list]): The parsed JSON object to be traversed.
+            keys (tuple): The keys whose values are to be collected.
+
+        Returns
+        -------
+            dict: A dictionary mapping each key to the list of values found for it, in document order.
+        """
+        found = {key: [] for key in keys}
+        stack = [(None, data)]
+        while stack:
+            key, node = stack.pop()
+            if key in found:
+                found[key].append(node)
+            if isinstance(node, dict):
+                stack.extend(reversed(list(node.items())))
+            elif isinstance(node, list):
+                stack.extend((None, item) for item in reversed(node))
+        return found
+
     @staticmethod
     def cleanhtml(text: str) -> str:
         """
-        Cleans a given text string from HTML tags. This is achieved by applying a regular expression that
-        matches any text within '<' and '>'. All matched substrings are replaced with an empty string,
+        Cleans a given text string from HTML tags. This is achieved by applying a precompiled regular expression
+        that matches any text within '<' and '>'. All matched substrings are replaced with an empty string,
         effectively removing all HTML tags.
 
         Args:
@@ -133,23 +168,24 @@ class BaseProcessing:
         -------
             str: The cleaned text string.
         """
-        return re.sub(re.compile("<.*?>"), "", text)
+        return _HTML_TAG_RE.sub("", text)
 
     @staticmethod
-    def extract_text_by_xpath(tree: HtmlElement, selector: str) -> Optional[str]:
+    def extract_text_by_xpath(tree: HtmlElement, selector: Union[str, etree.XPath]) -> Optional[str]:
         """
         Extracts text data from the provided HTML tree using the provided XPath selector.
         The extracted data is joined into a single string.
 
         Args:
             tree (HtmlElement): An lxml HtmlElement from which data is to be extracted.
-            selector (str): An XPath selector used to locate the data in the HTML tree.
+            selector (Union[str, etree.XPath]): An XPath selector used to locate the data in the HTML tree,
+                either as a string or as a precompiled `etree.XPath` for selectors used repeatedly.
 
         Returns
         -------
             Optional[str]: A string containing the joined text data, or None if no data is found using the selector.
         """
-        data = tree.xpath(selector)
+        data = selector(tree) if isinstance(selector, etree.XPath) else tree.xpath(selector)
         if not data:
             return None
         return " ".join(data).replace("\n", "").replace("&nbsp;", "")
@@ -8,14 +8,43 @@ The script also sets up command line arguments for controlling full-load and deb
 """
 
 import argparse
+import base64
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
+from threading import local
+from typing import Optional
 
 from loguru import logger
-from lxml import html
+from lxml import etree
+from pymongo import ReplaceOne
 
 from processing._base import BaseProcessing
 
+_XPATH_TITLE = etree.XPath('//meta[@property="og:title"]//@content')
+_XPATH_DESCRIPTION = etree.XPath('//meta[@name="description"]//@content')
+_XPATH_TEXTS = etree.XPath("//p//text()")
+
+_thread_local = local()
+
+
+def _get_html_parser(encoding: Optional[str] = None) -> etree.HTMLParser:
+    """
+    Returns an HTML parser for the current thread and the given encoding, so that worker threads don't serialize
+    on a shared parser. Comments and processing instructions are dropped while parsing since none of the selectors
+    use them.
+    """
+    if not hasattr(_thread_local, "parsers"):
+        _thread_local.parsers = {}
+    if encoding not in _thread_local.parsers:
+        _thread_local.parsers[encoding] = etree.HTMLParser(
+            encoding=encoding,
+            remove_comments=True,
+            remove_pis=True,
+            no_network=True,
+        )
+    return _thread_local.parsers[encoding]
+
 
 @dataclass
 class Superside(BaseProcessing):
@@ -32,34 +61,84 @@ class Superside(BaseProcessing):
         Processes HTML files from the S3 path 'pages/Superside', extracting specific elements
         from each HTML and updating or inserting the data into a MongoDB collection.
 
-        HTML elements extracted include the title, description, and text content, identified using XPath.
+        Files whose S3 ETag matches the one stored on a previous run are unchanged and skipped without
+        being read. The remaining files are read and parsed concurrently using a pool of `max_workers`
+        threads, and the resulting items are upserted in unordered bulk writes of up to `bulk_size` operations.
 
-        Each item in the MongoDB collection consists of the URL, title, description, texts, and timestamp.
+        Each item in the MongoDB collection consists of the URL, title, description, texts, S3 key and ETag,
+        and timestamp.
 
         Returns
         -------
         None
         """
-        files = self.s3.list_files_from_path(f"pages/{self.company}")
-
-        for file in files:
-            logger.debug(f"Processing file: {file}")
-            file_contents = self.s3.read_json(path=file)
-            tree = html.fromstring(file_contents.get("content"))
-
-            title = self.extract_text_by_xpath(tree, '//meta[@property="og:title"]//@content')
-            description = self.extract_text_by_xpath(tree, '//meta[@name="description"]//@content')
-            texts = self.extract_text_by_xpath(tree, "//p//text()")
+        processed = {
+            doc["s3_key"]: doc["s3_etag"]
+            for doc in self.collection.find(
+                filter={"s3_key": {"$exists": True}},
+                projection={"s3_key": 1, "s3_etag": 1, "_id": 0},
+            )
+        }
+        objects = (
+            obj
+            for obj in self.s3.iter_objects_from_path(f"pages/{self.company}")
+            if processed.get(obj["Key"]) != obj["ETag"]
+        )
+
+        operations = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for item in executor.map(self._process_file, objects):
+                if item is None:
+                    continue
+                operations.append(ReplaceOne(filter={"url": item.get("url")}, replacement=item, upsert=True))
+                if len(operations) >= self.bulk_size:
+                    self.collection.bulk_write(operations, ordered=False)
+                    operations.clear()
+
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def _process_file(self, obj: dict) -> Optional[dict]:
+        """
+        Reads a single HTML file from S3 and extracts its title, description, and text content
+        using precompiled XPath expressions.
 
-            item = {
-                "url": file_contents.get("url"),
-                "title": title,
-                "description": description,
-                "texts": texts,
-                "updated_at": datetime.now(),
-            }
+        Args:
+            obj (dict): The S3 object of the file to be processed, as listed by `iter_objects_from_path`.
 
-            self.collection.replace_one(filter={"url": item.get("url")}, replacement=item, upsert=True)
+        Returns
+        -------
+            Optional[dict]: The item to be stored in the MongoDB collection, or None if the file could not
+            be processed. Failures are logged and skipped so that they don't abort the whole run.
+        """
+        file = obj["Key"]
+        logger.debug(f"Processing file: {file}")
+        try:
+            file_contents = self.s3.read_json(path=file)
+            if "content_b64" in file_contents:
+                content = base64.b64decode(file_contents["content_b64"])
+                parser = _get_html_parser(file_contents.get("encoding"))
+            else:
+                content = file_contents.get("content")
+                parser = _get_html_parser()
+            tree = etree.fromstring(content, parser=parser)
+
+            title = self.extract_text_by_xpath(tree, _XPATH_TITLE)
+            description = self.extract_text_by_xpath(tree, _XPATH_DESCRIPTION)
+            texts = self.extract_text_by_xpath(tree, _XPATH_TEXTS)
+        except Exception:
+            logger.exception(f"Failed to process file: {file}")
+            return None
+
+        return {
+            "url": file_contents.get("url"),
+            "title": title,
+            "description": description,
+            "texts": texts,
+            "s3_key": file,
+            "s3_etag": obj["ETag"],
+            "updated_at": datetime.now(),
+        }
 
 
 if __name__ == "__main__":
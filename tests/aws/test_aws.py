@@ -25,6 +25,17 @@ def test_list_files_from_path(s3_client, s3_create_bucket):
     assert awss3.list_files_from_path() == ["test.json"]
 
 
+def test_list_files_from_path_paginates(s3_client, s3_create_bucket):
+    awss3 = AWSS3(aws_access_key_id="testing", aws_secret_access_key="testing", bucket_name="test_bucket")
+    awss3.client = s3_client
+
+    keys = [f"pages/test{i:04d}.json" for i in range(1001)]
+    for key in keys:
+        s3_client.put_object(Bucket="test_bucket", Key=key, Body=b"{}")
+
+    assert awss3.list_files_from_path("pages/") == keys
+
+
 def test_read_json(s3_client, s3_create_bucket):
     awss3 = AWSS3(aws_access_key_id="testing", aws_secret_access_key="testing", bucket_name="test_bucket")
     awss3.client = s3_client
@@ -33,3 +44,10 @@ def test_read_json(s3_client, s3_create_bucket):
     s3_client.put_object(Bucket="test_bucket", Key="test.json", Body=json.dumps(test_dict))
 
     assert awss3.read_json("test.json") == test_dict
+
+
+def test_client_is_shared(aws_credentials):
+    awss3 = AWSS3(aws_access_key_id="testing", aws_secret_access_key="testing", bucket_name="test_bucket")
+    other = AWSS3(aws_access_key_id="testing", aws_secret_access_key="testing", bucket_name="other_bucket")
+
+    assert awss3.client is other.client
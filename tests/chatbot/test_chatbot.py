@@ -0,0 +1,213 @@
+import asyncio
+import os
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+from langchain.docstore.document import Document
+from langchain.embeddings.base import Embeddings
+
+from chatbot.chatbot import CachedEmbeddings, Chatbot
+
+
+class StubEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def embed_documents(self, texts):
+        self.calls.append(texts)
+        return [[float(len(text))] for text in texts]
+
+    async def aembed_documents(self, texts):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return [float(len(text))]
+
+
+@pytest.fixture
+def chatbot(tmp_path):
+    return Chatbot(company="Test", persist_directory=str(tmp_path / "chroma"))
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({"url": ["http://test.url"], "text": ["Test text"]})
+
+
+def test_get_company_data(chatbot):
+    chatbot.collection = MagicMock()
+    chatbot.collection.find = MagicMock(
+        return_value=iter([{"url": "http://test.url", "title": "T", "description": "D", "texts": "C"}]),
+    )
+
+    df = chatbot.get_company_data()
+
+    chatbot.collection.find.assert_called_once_with(
+        filter={
+            "url": {"$ne": None},
+            "title": {"$ne": None},
+            "description": {"$ne": None},
+            "texts": {"$ne": None},
+        },
+        projection={"url": 1, "title": 1, "description": 1, "texts": 1, "_id": 0},
+        batch_size=1000,
+    )
+    assert df.to_dict("records") == [{"url": "http://test.url", "text": "Title: T\nDescription: D\nContent: C"}]
+
+
+def test_get_company_data_empty(chatbot):
+    chatbot.collection = MagicMock()
+    chatbot.collection.find = MagicMock(return_value=iter([]))
+
+    df = chatbot.get_company_data()
+
+    assert df.empty
+    assert list(df.columns) == ["url", "text"]
+
+
+def test_get_fingerprint(chatbot, data):
+    fingerprint = chatbot.get_fingerprint(data)
+
+    assert chatbot.get_fingerprint(data.copy()) == fingerprint
+    assert chatbot.get_fingerprint(data.assign(text="Other text")) != fingerprint
+
+    chatbot.chunk_size = 500
+    assert chatbot.get_fingerprint(data) != fingerprint
+
+
+def test_is_vectorstore_current(chatbot):
+    assert not chatbot.is_vectorstore_current("abc")
+
+    os.makedirs(chatbot.persist_directory)
+    with open(os.path.join(chatbot.persist_directory, ".fingerprint"), "w") as f:
+        f.write("abc")
+
+    assert chatbot.is_vectorstore_current("abc")
+    assert not chatbot.is_vectorstore_current("def")
+
+
+def test_build_vectorstore_replaces_collection_only(chatbot):
+    os.makedirs(chatbot.persist_directory)
+    unrelated_path = os.path.join(chatbot.persist_directory, "unrelated.txt")
+    with open(unrelated_path, "w") as f:
+        f.write("keep")
+
+    documents = [Document(page_content="a", metadata={"url": "http://test.url"})]
+    chatbot.build_vectorstore(documents, StubEmbeddings(), "abc")
+    docsearch = chatbot.build_vectorstore(documents, StubEmbeddings(), "def")
+
+    assert docsearch._collection.count() == 1
+    assert os.path.isfile(unrelated_path)
+    assert chatbot.is_vectorstore_current("def")
+
+
+def test_aembed_documents(chatbot):
+    chatbot.embedding_batch_size = 3
+    chatbot.embedding_concurrency = 2
+    embedding = StubEmbeddings()
+    texts = ["a" * length for length in range(1, 11)]
+
+    vectors = asyncio.run(chatbot.aembed_documents(embedding, texts))
+
+    assert vectors == [[float(length)] for length in range(1, 11)]
+    assert [len(batch) for batch in embedding.calls] == [3, 3, 3, 1]
+    assert embedding.max_in_flight == 2
+
+
+def test_aembed_documents_spreads_small_corpus(chatbot):
+    chatbot.embedding_concurrency = 4
+    embedding = StubEmbeddings()
+
+    asyncio.run(chatbot.aembed_documents(embedding, ["a"] * 10))
+
+    assert [len(batch) for batch in embedding.calls] == [3, 3, 3, 1]
+    assert embedding.max_in_flight == 4
+
+
+def test_get_cached_answer_hit(chatbot):
+    chatbot.cache_answer(np.array([1.0, 0.0]), "answer")
+
+    assert chatbot.get_cached_answer(np.array([1.0, 0.0])) == "answer"
+    assert chatbot.get_cached_answer(np.array([0.96, 0.28])) == "answer"
+
+
+def test_get_cached_answer_miss(chatbot):
+    assert chatbot.get_cached_answer(np.array([1.0, 0.0])) is None
+
+    chatbot.cache_answer(np.array([1.0, 0.0]), "answer")
+
+    assert chatbot.get_cached_answer(np.array([0.8, 0.6])) is None
+
+
+def test_get_cached_answer_promotes_hit(chatbot):
+    chatbot.cache_size = 2
+    chatbot.cache_answer(np.array([1.0, 0.0]), "first")
+    chatbot.cache_answer(np.array([0.0, 1.0]), "second")
+
+    assert chatbot.get_cached_answer(np.array([1.0, 0.0])) == "first"
+
+    chatbot.cache_answer(np.array([0.6, 0.8]), "third")
+
+    assert chatbot.get_cached_answer(np.array([1.0, 0.0])) == "first"
+    assert chatbot.get_cached_answer(np.array([0.0, 1.0])) is None
+
+
+def test_cache_answer_evicts_least_recently_used(chatbot):
+    chatbot.cache_size = 2
+    chatbot.cache_answer(np.array([1.0, 0.0]), "first")
+    chatbot.cache_answer(np.array([0.0, 1.0]), "second")
+    chatbot.cache_answer(np.array([0.6, 0.8]), "third")
+
+    assert len(chatbot._qcache) == 2
+    assert chatbot.get_cached_answer(np.array([1.0, 0.0])) is None
+    assert chatbot.get_cached_answer(np.array([0.0, 1.0])) == "second"
+
+
+@pytest.fixture
+def cached_embeddings(tmp_path):
+    return CachedEmbeddings(embeddings=StubEmbeddings(), cache_dir=str(tmp_path / "emb_cache"), namespace="test")
+
+
+def test_cached_embeddings_embeds_duplicates_once(cached_embeddings):
+    assert cached_embeddings.embed_documents(["a", "bb", "a"]) == [[1.0], [2.0], [1.0]]
+    assert cached_embeddings.embeddings.calls == [["a", "bb"]]
+
+
+def test_cached_embeddings_reuses_cache(cached_embeddings):
+    cached_embeddings.embed_documents(["a", "bb"])
+    cached_embeddings.embeddings.calls.clear()
+
+    assert cached_embeddings.embed_documents(["bb", "a"]) == [[2.0], [1.0]]
+    assert asyncio.run(cached_embeddings.aembed_documents(["a", "ccc"])) == [[1.0], [3.0]]
+    assert cached_embeddings.embeddings.calls == [["ccc"]]
+
+
+def test_cached_embeddings_treats_corrupt_entry_as_miss(cached_embeddings):
+    with open(cached_embeddings._path("a"), "w") as f:
+        f.write("[1.")
+
+    assert cached_embeddings.embed_documents(["a"]) == [[1.0]]
+    assert cached_embeddings.embeddings.calls == [["a"]]
+    assert cached_embeddings.embed_documents(["a"]) == [[1.0]]
+    assert cached_embeddings.embeddings.calls == [["a"]]
+
+
+def test_cached_embeddings_memoizes_queries(cached_embeddings):
+    cached_embeddings.query_cache_size = 2
+
+    assert cached_embeddings.embed_query("a") == [1.0]
+    assert cached_embeddings.embed_query("a") == [1.0]
+    cached_embeddings.embed_query("bb")
+    cached_embeddings.embed_query("ccc")
+    cached_embeddings.embed_query("a")
+
+    assert cached_embeddings.embeddings.calls == ["a", "bb", "ccc", "a"]
@@ -0,0 +1,51 @@
+import base64
+from threading import BoundedSemaphore, Event
+from unittest.mock import MagicMock
+
+from scrapy.http import HtmlResponse
+
+from crawler.spiders.superside import SupersideSpider
+
+
+def test_parse_item_uploads_in_background():
+    spider = SupersideSpider()
+    spider.s3 = MagicMock()
+    response = HtmlResponse(url="https://www.superside.com/about", body="<p>Café</p>".encode(), encoding="utf-8")
+
+    spider.parse_item(response)
+    spider.closed("finished")
+
+    spider.s3.save_dict_to_json.assert_called_once_with(
+        item={
+            "url": "https://www.superside.com/about",
+            "content_b64": base64.b64encode("<p>Café</p>".encode()).decode(),
+            "encoding": "utf-8",
+        },
+        path="pages/Superside/www.superside.com-about.json",
+    )
+
+
+def test_executor_is_created_per_spider():
+    first = SupersideSpider()
+    first.closed("finished")
+
+    second = SupersideSpider()
+    assert second.executor is not first.executor
+    assert second.executor.submit(lambda: "uploaded").result() == "uploaded"
+    second.closed("finished")
+
+
+def test_parse_item_bounds_pending_uploads():
+    spider = SupersideSpider()
+    spider.pending_uploads = BoundedSemaphore(1)
+    uploading = Event()
+    spider.s3 = MagicMock()
+    spider.s3.save_dict_to_json = MagicMock(side_effect=lambda **kwargs: uploading.wait())
+    response = HtmlResponse(url="https://www.superside.com/about", body=b"<p>Test</p>", encoding="utf-8")
+
+    spider.parse_item(response)
+    assert not spider.pending_uploads.acquire(blocking=False)
+
+    uploading.set()
+    spider.closed("finished")
+    assert spider.pending_uploads.acquire(blocking=False)
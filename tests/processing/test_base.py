@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock
 
+from lxml import etree, html
 from lxml.html import HtmlElement
 from pymongo.collection import Collection
 
@@ -12,6 +13,18 @@ def test_get_files_paths(mocker):
     assert bp.get_files_paths() == ["file1", "file2", "file3"]
 
 
+def test_get_files_paths_filters_invalid_pages(mocker):
+    mocker.patch("processing._base.glob", return_value=["page-blog-tag-a.json", "page-about.json"])
+    bp = BaseProcessing("Test", False, False)
+    assert bp.get_files_paths() == ["page-about.json"]
+
+
+def test_get_files_paths_without_invalid_pages(mocker):
+    mocker.patch("processing._base.glob", return_value=["page-blog-tag-a.json", "page-about.json"])
+    bp = BaseProcessing("Test", False, False, invalid_pages=())
+    assert bp.get_files_paths() == ["page-blog-tag-a.json", "page-about.json"]
+
+
 def test_extract_next_data(mocker):
     bp = BaseProcessing("Test", False, False)
     html_element = HtmlElement()
@@ -20,6 +33,17 @@ def test_extract_next_data(mocker):
     assert bp.extract_next_data(html_element) == "Test paragraph"
 
 
+def test_lookup_keys():
+    data = {
+        "props": {"body": "inner"},
+        "paragraph": "a",
+        "items": [{"body": "b"}, {"content": {"paragraph": "c"}}],
+        "body": "outer",
+    }
+    found = BaseProcessing.lookup_keys(data, ("paragraph", "body", "content"))
+    assert found == {"paragraph": ["a", "c"], "body": ["inner", "b", "outer"], "content": [{"paragraph": "c"}]}
+
+
 def test_extract_text_by_xpath(mocker):
     html_element = HtmlElement()
     mocker.patch.object(html_element, "xpath", return_value=["Test text"])
@@ -27,6 +51,12 @@ def test_extract_text_by_xpath(mocker):
     assert bp.extract_text_by_xpath(html_element, "//div") == "Test text"
 
 
+def test_extract_text_by_compiled_xpath():
+    tree = html.fromstring("<div><p>Test</p><p>text</p></div>")
+    bp = BaseProcessing("Test", False, False)
+    assert bp.extract_text_by_xpath(tree, etree.XPath("//p//text()")) == "Test text"
+
+
 def test_cleanhtml(mocker):
     bp = BaseProcessing("Test", False, False)
     text = "<div>Test</div>"
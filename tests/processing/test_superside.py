@@ -1,3 +1,4 @@
+import base64
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -5,6 +6,8 @@ import pytest
 from processing._base import BaseProcessing
 from processing.superside import Superside
 
+HTML_CONTENT = {"content": "<div><p>Test content</p></div>", "url": "http://test.url"}
+
 
 @pytest.fixture
 def mock_base_processing():
@@ -18,16 +21,91 @@ def mock_superside(mock_base_processing):
         yield Superside(company="Superside", full_load=False, debug=False)
 
 
-def test_run(mock_superside):
-    mock_superside.s3 = MagicMock()
-    mock_superside.s3.list_files_from_path = MagicMock(return_value=["test1.json"])
-    mock_superside.s3.read_json = MagicMock(
-        return_value={"content": "<div><p>Test content</p></div>", "url": "http://test.url"},
-    )
+@pytest.fixture
+def setup_run(mock_superside):
+    """
+    Mocks S3 and MongoDB for `Superside.run`. `objects` maps the listed S3 keys to their ETags, `read_json` is the
+    file payload (or a callable computing it from the path) and `processed` maps the keys already stored in MongoDB
+    to their ETags. Returns the mocked MongoDB collection.
+    """
+
+    def setup(objects: dict, read_json, processed: dict = None) -> MagicMock:
+        mock_superside.s3 = MagicMock()
+        mock_superside.s3.iter_objects_from_path = MagicMock(
+            return_value=iter([{"Key": key, "ETag": etag} for key, etag in objects.items()]),
+        )
+        if callable(read_json):
+            mock_superside.s3.read_json = MagicMock(side_effect=read_json)
+        else:
+            mock_superside.s3.read_json = MagicMock(return_value=read_json)
+
+        mock_superside.collection = MagicMock()
+        mock_superside.collection.find = MagicMock(
+            return_value=[{"s3_key": key, "s3_etag": etag} for key, etag in (processed or {}).items()],
+        )
+        return mock_superside.collection
+
+    return setup
+
+
+def test_run(mock_superside, setup_run):
+    mock_collection = setup_run({"test1.json": '"1"'}, HTML_CONTENT)
     mock_superside.extract_text_by_xpath = MagicMock(return_value="Test content")
 
-    mock_collection = MagicMock()
-    mock_superside.collection = mock_collection
+    mock_superside.run()
+    assert mock_collection.bulk_write.call_count == 1
+    operations = mock_collection.bulk_write.call_args.args[0]
+    assert len(operations) == 1
+    assert operations[0]._filter == {"url": "http://test.url"}
+
+
+def test_run_parses_base64_content(mock_superside, setup_run):
+    mock_collection = setup_run(
+        {"test1.json": '"1"'},
+        {"content_b64": base64.b64encode(b"<div><p>Test content</p></div>").decode(), "url": "http://test.url"},
+    )
+
+    mock_superside.run()
+    operations = mock_collection.bulk_write.call_args.args[0]
+    assert operations[0]._doc["texts"] == "Test content"
+
+
+def test_run_skips_unchanged_files(mock_superside, setup_run):
+    mock_collection = setup_run(
+        {"test1.json": '"1"', "test2.json": '"2"'},
+        HTML_CONTENT,
+        processed={"test1.json": '"1"'},
+    )
+
+    mock_superside.run()
+    mock_superside.s3.read_json.assert_called_once_with(path="test2.json")
+    operations = mock_collection.bulk_write.call_args.args[0]
+    assert [operation._doc["s3_key"] for operation in operations] == ["test2.json"]
+
+
+def test_run_skips_failed_files(mock_superside, setup_run):
+    def read_json(path):
+        if path == "test1.json":
+            raise Exception("Failed to read")
+        return HTML_CONTENT
+
+    mock_collection = setup_run({"test1.json": '"1"', "test2.json": '"2"'}, read_json)
+
+    mock_superside.run()
+    operations = mock_collection.bulk_write.call_args.args[0]
+    assert [operation._doc["s3_key"] for operation in operations] == ["test2.json"]
+
+
+def test_run_parses_base64_content_with_encoding(mock_superside, setup_run):
+    mock_collection = setup_run(
+        {"test1.json": '"1"'},
+        {
+            "content_b64": base64.b64encode("<div><p>Café naïve — ok</p></div>".encode("utf-8")).decode(),
+            "encoding": "utf-8",
+            "url": "http://test.url",
+        },
+    )
 
     mock_superside.run()
-    assert mock_collection.replace_one.called
+    operations = mock_collection.bulk_write.call_args.args[0]
+    assert operations[0]._doc["texts"] == "Café naïve — ok"